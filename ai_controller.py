@@ -8,8 +8,9 @@ import time
 import requests
 import json
 import logging
-import random
+import numpy as np
 from abc import ABC, abstractmethod
+from collections import deque
 import anthropic
 import os
 from dotenv import load_dotenv
@@ -22,6 +23,113 @@ logger = logging.getLogger(__name__)
 # Configuration
 API_BASE_URL = "http://localhost:5000/api"
 
+# orjson is a much faster drop-in JSON codec; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps  # returns bytes
+except ImportError:
+    _json_loads = json.loads
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
+# Reuse one keep-alive connection pool instead of opening a fresh TCP
+# connection for every API call
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_session.headers.update({"Content-Type": "application/json"})
+
+
+# numba is optional - with it installed the decision kernels below are
+# JIT compiled to native code, otherwise they run as plain Python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Screen names that count as being in a battle
+_BATTLE_SCREENS = frozenset({"battle", "wild_battle", "trainer_battle", "gym_battle"})
+
+# Movement directions, indexable by the pre-drawn direction buffer
+_DIRS = ("up", "down", "left", "right")
+
+# Exploration options keyed by the last direction moved - each entry leaves
+# out the direction that would immediately backtrack
+_CLAUDE_OPTIONS = {
+    "up": ("up", "left", "right"),
+    "down": ("down", "left", "right"),
+    "left": ("up", "down", "left"),
+    "right": ("up", "down", "right"),
+    None: _DIRS,
+}
+
+# How many random draws to batch per refill
+_RAND_BUF_SIZE = 4096
+
+# Integer action encoding used by the JIT-compiled decision kernels
+_ACTIONS = ("a", "b", "up", "down", "left", "right")
+_ACT_A, _ACT_B, _ACT_UP, _ACT_DOWN, _ACT_LEFT, _ACT_RIGHT = range(6)
+
+# The intro through starter selection is fully deterministic, so each AI's
+# opening moves are a flat (action, commentary) table keyed on how many
+# actions it has taken, instead of random exploration branches
+_GROK_INTRO = (
+    ("a", "Let's start our Pokémon adventure!"),
+    ("a", "Skipping through Professor Oak's introduction..."),
+    ("a", "Almost through the intro dialogue..."),
+    ("a", "Time to pick a name and get going!"),
+    ("a", "Here we go - into the world of Pokémon!"),
+    ("down", "Heading over to the Poké Balls in Oak's lab."),
+    ("right", "Looking at the starter options. I'll choose Squirtle!"),
+    ("right", "Squirtle's ball should be on this side."),
+    ("a", "Squirtle is a great Water-type starter. Strong against the first gym!"),
+    ("a", "Yes, I want Squirtle as my partner!"),
+    ("a", "Getting through the rival's starter pick..."),
+    ("a", "Getting through the initial dialogue..."),
+    ("a", "Almost ready to start exploring!"),
+)
+
+_CLAUDE_INTRO = (
+    ("a", "I'm excited to start this Pokémon journey! Let's see what awaits us."),
+    ("a", "Listening to Professor Oak's introduction..."),
+    ("a", "Working through the opening dialogue..."),
+    ("a", "Choosing a name and moving on."),
+    ("a", "Into the world of Pokémon we go!"),
+    ("down", "Walking over to the starter Pokémon in the lab."),
+    ("left", "I think Bulbasaur is an excellent strategic choice for the early gyms."),
+    ("left", "Bulbasaur's ball should be over here."),
+    ("a", "Bulbasaur is my choice - great for the first two gyms!"),
+    ("a", "Confirming Bulbasaur as my partner."),
+    ("a", "Watching the rival pick their starter..."),
+    ("a", "Finishing the introductory dialogue..."),
+    ("a", "Now we're ready to explore methodically."),
+)
+
+
+@njit(cache=True)
+def _grok_battle_kernel(hp, max_hp, team_size):
+    """Grok's battle policy on scalars. Returns (action index, comment index)."""
+    if team_size == 0:
+        return _ACT_A, 0
+    if hp / max_hp < 0.3:
+        return _ACT_B, 1
+    return _ACT_A, 2
+
+
+@njit(cache=True)
+def _claude_battle_kernel(hp, max_hp, team_size, rand_switch, rand_move):
+    """Claude's battle policy on scalars. Returns (action index, comment index)."""
+    if team_size == 0:
+        return _ACT_A, 0
+    if hp / max_hp < 0.2 and team_size > 1 and rand_switch < 0.7:
+        return _ACT_B, 1
+    if rand_move < 0.4:
+        return _ACT_DOWN, 2
+    return _ACT_A, 3
+
 
 # Load environment variables from .env file
 load_dotenv()
@@ -41,9 +149,39 @@ class PokemonAI(ABC):
         self.name = name
         self.game_state = {}
         self.screen_state = None
-        self.previous_actions = []
+        self.previous_actions = deque(maxlen=20)  # Only the last 20 actions are kept
         self.current_role = "player"  # "player" or "pokemon"
-    
+
+        # Pre-draw batches of random numbers so each decision costs a
+        # buffer index instead of a call into the random module
+        self._rng = np.random.default_rng()
+        self._unif_buf = self._rng.random(_RAND_BUF_SIZE)
+        self._unif_i = 0
+        self._dir_buf = self._rng.integers(0, 4, size=_RAND_BUF_SIZE)
+        self._dir_i = 0
+
+    def _next_uniform(self):
+        """Return the next pre-drawn uniform random float in [0, 1)."""
+        if self._unif_i >= _RAND_BUF_SIZE:
+            self._unif_buf = self._rng.random(_RAND_BUF_SIZE)
+            self._unif_i = 0
+        value = self._unif_buf[self._unif_i]
+        self._unif_i += 1
+        return value
+
+    def _next_direction_index(self):
+        """Return the next pre-drawn direction index in [0, 4)."""
+        if self._dir_i >= _RAND_BUF_SIZE:
+            self._dir_buf = self._rng.integers(0, 4, size=_RAND_BUF_SIZE)
+            self._dir_i = 0
+        index = self._dir_buf[self._dir_i]
+        self._dir_i += 1
+        return index
+
+    def _next_direction(self):
+        """Return the next pre-drawn random movement direction."""
+        return _DIRS[self._next_direction_index()]
+
     @abstractmethod
     def decide_action(self, game_state, screen_state=None, role="player"):
         """
@@ -67,10 +205,8 @@ class PokemonAI(ABC):
     
     def record_action(self, action):
         """Record an action taken by the AI."""
+        # The deque's maxlen evicts the oldest action automatically
         self.previous_actions.append(action)
-        # Keep only the last 20 actions
-        if len(self.previous_actions) > 20:
-            self.previous_actions.pop(0)
     
     def set_role(self, role):
         """Set the current role of the AI."""
@@ -105,45 +241,40 @@ class GrokAI(PokemonAI):
     def _decide_player_action(self):
         """Decide actions for player movement and exploration."""
         location = self.game_state.get("location", "")
-        
-        # Starting the game
-        if location == "PALLET TOWN" and not self.previous_actions:
-            return "a", "Let's start our Pokémon adventure!"
-        
-        # Choose starter Pokémon
-        if "SQUIRTLE" not in str(self.game_state) and len(self.previous_actions) < 15:
-            # Try to navigate to and select Squirtle
-            if random.random() < 0.5:
-                return "a", "Exploring the options..."
-            else:
-                return random.choice(["up", "down", "left", "right"]), "Looking for Squirtle..."
-        
+
+        # Scripted intro: follow the precomputed table until it's exhausted
+        steps_taken = len(self.previous_actions)
+        if location == "PALLET TOWN" and steps_taken < len(_GROK_INTRO):
+            return _GROK_INTRO[steps_taken]
+
         # Basic exploration logic
-        if random.random() < 0.3:
+        if self._next_uniform() < 0.3:
             # Talk to NPCs or interact with objects
             return "a", "Let's see what this person has to say!"
         else:
             # Move around
-            direction = random.choice(["up", "down", "left", "right"])
+            direction = self._next_direction()
             return direction, f"Exploring in the {direction} direction."
     
+    # Commentary strings indexed by the kernel's comment index
+    _BATTLE_COMMENTS = (
+        "Let's see what happens next in this battle!",
+        "Our Pokémon is low on health! Let's use a potion.",
+        "Using our strongest move! It should be super effective!",
+    )
+
     def _decide_pokemon_action(self):
         """Decide actions during Pokémon battles."""
-        # Get current Pokémon info
+        # Translate the state dict to scalars for the compiled kernel
         pokemon_team = self.game_state.get("pokemon_team", [])
-        
-        if not pokemon_team:
-            return "a", "Let's see what happens next in this battle!"
-        
-        # Check if we should use an item
-        current_pokemon = pokemon_team[0]
-        hp_percent = current_pokemon.get("hp", 0) / current_pokemon.get("max_hp", 1)
-        
-        if hp_percent < 0.3:
-            return "b", "Our Pokémon is low on health! Let's use a potion."
-        
-        # Choose a move based on simple type advantage (placeholder logic)
-        return "a", "Using our strongest move! It should be super effective!"
+        hp, max_hp = 0, 1
+        if pokemon_team:
+            current_pokemon = pokemon_team[0]
+            hp = current_pokemon.get("hp", 0)
+            max_hp = current_pokemon.get("max_hp", 1)
+
+        action_idx, comment_idx = _grok_battle_kernel(hp, max_hp, len(pokemon_team))
+        return _ACTIONS[action_idx], self._BATTLE_COMMENTS[comment_idx]
 
 
 class ClaudeAI(PokemonAI):
@@ -155,13 +286,19 @@ class ClaudeAI(PokemonAI):
         """Initialize the Claude AI."""
         super().__init__("Claude")
         self.strategy = "balanced"  # balanced, aggressive, defensive
-    
+        self._last_dir = None  # Last movement direction, for backtrack avoidance
+
         self.model = anthropic.Anthropic(
             api_key=claude_api_key,
         )
 
 
-    def _llm_call(self, system_prompt, user_prompt): 
+    def record_action(self, action):
+        """Record an action and remember the last movement direction."""
+        super().record_action(action)
+        self._last_dir = action if action in _DIRS else None
+
+    def _llm_call(self, system_prompt, user_prompt):
         return self.model.messages.create(
             model="claude-3-7-sonnet-20250219",
             max_tokens=1024,
@@ -191,69 +328,44 @@ class ClaudeAI(PokemonAI):
     def _decide_player_action(self):
         """Claude's player movement and exploration strategy."""
         location = self.game_state.get("location", "")
-        
-        # Starting the game
-        if location == "PALLET TOWN" and not self.previous_actions:
-            return "a", "I'm excited to start this Pokémon journey! Let's see what awaits us."
-        
-        # Choose starter Pokémon (Claude prefers Bulbasaur)
-        if "BULBASAUR" not in str(self.game_state) and len(self.previous_actions) < 15:
-            # Navigate to Bulbasaur
-            if "right" not in self.previous_actions[-3:] if self.previous_actions else True:
-                return "left", "I think Bulbasaur is an excellent strategic choice for the early gyms."
-            else:
-                return "a", "Bulbasaur is my choice - great for the first two gyms!"
-        
-        # More methodical exploration than Grok
-        recent_moves = self.previous_actions[-5:] if self.previous_actions else []
-        
-        # Avoid backtracking immediately
-        if recent_moves and recent_moves[-1] == "up":
-            avoid = "down"
-        elif recent_moves and recent_moves[-1] == "down":
-            avoid = "up"
-        elif recent_moves and recent_moves[-1] == "left":
-            avoid = "right"
-        elif recent_moves and recent_moves[-1] == "right":
-            avoid = "left"
-        else:
-            avoid = None
-        
-        # Systematic exploration
-        if avoid:
-            options = ["up", "down", "left", "right"]
-            options.remove(avoid)
-            direction = random.choice(options)
-        else:
-            direction = random.choice(["up", "down", "left", "right"])
-        
-        if random.random() < 0.25:
+
+        # Scripted intro: follow the precomputed table until it's exhausted
+        steps_taken = len(self.previous_actions)
+        if location == "PALLET TOWN" and steps_taken < len(_CLAUDE_INTRO):
+            return _CLAUDE_INTRO[steps_taken]
+
+        # More methodical exploration than Grok: the options table keyed by
+        # the last direction moved already excludes the immediate backtrack
+        options = _CLAUDE_OPTIONS[self._last_dir]
+        direction = options[self._next_direction_index() % len(options)]
+
+        if self._next_uniform() < 0.25:
             return "a", "I should check if there's anything interesting here."
         else:
             return direction, f"Let's explore {direction}ward and see what we find."
     
+    # Commentary strings indexed by the kernel's comment index
+    _BATTLE_COMMENTS = (
+        "Analyzing the battle situation...",
+        "Strategic retreat - let's switch to a healthier Pokémon.",
+        "Let's select a move with type advantage.",
+        "This move should be effective based on type matchups.",
+    )
+
     def _decide_pokemon_action(self):
         """Claude's battle strategy."""
-        # Get current Pokémon info
+        # Translate the state dict to scalars for the compiled kernel
         pokemon_team = self.game_state.get("pokemon_team", [])
-        
-        if not pokemon_team:
-            return "a", "Analyzing the battle situation..."
-        
-        # More strategic battle approach
-        current_pokemon = pokemon_team[0]
-        hp_percent = current_pokemon.get("hp", 0) / current_pokemon.get("max_hp", 1)
-        
-        # Consider switching if health is low
-        if hp_percent < 0.2 and len(pokemon_team) > 1:
-            if random.random() < 0.7:  # 70% chance to switch
-                return "b", "Strategic retreat - let's switch to a healthier Pokémon."
-        
-        # Type-based strategy (placeholder)
-        if random.random() < 0.4:
-            return "down", "Let's select a move with type advantage."
-        else:
-            return "a", "This move should be effective based on type matchups."
+        hp, max_hp = 0, 1
+        if pokemon_team:
+            current_pokemon = pokemon_team[0]
+            hp = current_pokemon.get("hp", 0)
+            max_hp = current_pokemon.get("max_hp", 1)
+
+        action_idx, comment_idx = _claude_battle_kernel(
+            hp, max_hp, len(pokemon_team),
+            self._next_uniform(), self._next_uniform())
+        return _ACTIONS[action_idx], self._BATTLE_COMMENTS[comment_idx]
 
 
 class AIManager:
@@ -265,34 +377,46 @@ class AIManager:
         """Initialize the AI Manager."""
         self.grok = GrokAI()
         self.claude = ClaudeAI()
+        self._ai_by_name = {"grok": self.grok, "claude": self.claude}
         self.active_player_ai = self.claude  # Default player AI
         self.active_pokemon_ai = self.claude  # Default Pokémon AI
         self.dual_mode = False  # Whether dual AI mode is enabled
-    
+        self._refresh_prefixes()
+
+    def _refresh_prefixes(self):
+        """Precompute the commentary prefix for each (dual_mode, in_battle) pair."""
+        player = self.active_player_ai.name
+        pokemon = self.active_pokemon_ai.name
+        # Indexed by (dual_mode << 1) | in_battle
+        self._prefixes = (
+            f"[{player}] ",              # single mode, exploring
+            f"[{player} in Battle] ",    # single mode, in battle
+            f"[{player} as Trainer] ",   # dual mode, exploring
+            f"[{pokemon} as Pokémon] ",  # dual mode, in battle
+        )
+
     def set_active_player_ai(self, ai_name):
         """Set the active player AI."""
-        if ai_name.lower() == "grok":
-            self.active_player_ai = self.grok
-        elif ai_name.lower() == "claude":
-            self.active_player_ai = self.claude
-        else:
+        ai = self._ai_by_name.get(ai_name.lower())
+        if ai is None:
             logger.warning(f"Unknown AI: {ai_name}. Using Grok as default.")
-            self.active_player_ai = self.grok
-        
+            ai = self.grok
+        self.active_player_ai = ai
+        self._refresh_prefixes()
+
         logger.info(f"Set active player AI to {self.active_player_ai.name}")
-    
+
     def set_active_pokemon_ai(self, ai_name):
         """Set the active Pokémon AI."""
-        if ai_name.lower() == "grok":
-            self.active_pokemon_ai = self.grok
-        elif ai_name.lower() == "claude":
-            self.active_pokemon_ai = self.claude
-        else:
+        ai = self._ai_by_name.get(ai_name.lower())
+        if ai is None:
             logger.warning(f"Unknown AI: {ai_name}. Using Claude as default.")
-            self.active_pokemon_ai = self.claude
-        
+            ai = self.claude
+        self.active_pokemon_ai = ai
+        self._refresh_prefixes()
+
         logger.info(f"Set active Pokémon AI to {self.active_pokemon_ai.name}")
-    
+
     def set_dual_mode(self, enabled):
         """Enable or disable dual AI mode."""
         self.dual_mode = enabled
@@ -309,23 +433,19 @@ class AIManager:
         """
         # Determine if we're in a battle
         in_battle = self._is_in_battle(game_state)
-        
+
         if self.dual_mode and in_battle:
             # We're in a battle, use the Pokémon AI
             ai = self.active_pokemon_ai
             role = "pokemon"
-            prefix = f"[{ai.name} as Pokémon] "
         else:
             # We're exploring or dual mode is off, use the player AI
             ai = self.active_player_ai
             role = "player" if not in_battle else "pokemon"  # Still specify the correct role even in single mode
-            
-            if self.dual_mode:
-                prefix = f"[{ai.name} as Trainer] "
-            else:
-                # In single mode, make it clear if we're in battle or not
-                prefix = f"[{ai.name}] " if not in_battle else f"[{ai.name} in Battle] "
-        
+
+        # Look up the precomputed prefix instead of rebuilding it per call
+        prefix = self._prefixes[(self.dual_mode << 1) | in_battle]
+
         # Get the AI's decision
         action, commentary = ai.decide_action(game_state, screen_state, role)
         
@@ -339,19 +459,17 @@ class AIManager:
     
     def _is_in_battle(self, game_state):
         """Determine if the game is currently in a battle."""
-        # This is a simplified placeholder - would need game-specific logic
-        # Could check for battle indicator in game_state or screen_state
-        # For now, we'll use a simple heuristic
-        if "battle" in str(game_state).lower() or game_state.get("screen", "") == "battle":
-            return True
-        return False
+        # The emulator publishes a precomputed in_battle flag in its state;
+        # fall back to a set-membership check on the screen name so older
+        # state dicts and battle sub-screens still work
+        return bool(game_state.get("in_battle")) or game_state.get("screen") in _BATTLE_SCREENS
 
 
 def get_game_screenshot():
     """Get screenshot from the API."""
     try:
-        response = requests.get(f"{API_BASE_URL}/screenshot")
-        return response.json()
+        response = _session.get(f"{API_BASE_URL}/screenshot")
+        return _json_loads(response.content)
     except Exception as e:
         logger.error(f"Error getting game status: {e}")
         return {"status": "error"}
@@ -359,8 +477,8 @@ def get_game_screenshot():
 def get_game_status():
     """Get the current game status from the API."""
     try:
-        response = requests.get(f"{API_BASE_URL}/status")
-        return response.json()
+        response = _session.get(f"{API_BASE_URL}/status")
+        return _json_loads(response.content)
     except Exception as e:
         logger.error(f"Error getting game status: {e}")
         return {"status": "error"}
@@ -368,8 +486,8 @@ def get_game_status():
 def get_game_state():
     """Get the current game state from the API."""
     try:
-        response = requests.get(f"{API_BASE_URL}/state")
-        return response.json()
+        response = _session.get(f"{API_BASE_URL}/state")
+        return _json_loads(response.content)
     except Exception as e:
         logger.error(f"Error getting game state: {e}")
         return {}
@@ -381,22 +499,35 @@ def execute_action(action, commentary=None):
         data["commentary"] = commentary
     
     try:
-        response = requests.post(f"{API_BASE_URL}/execute_action", json=data)
-        result = response.json()
+        response = _session.post(f"{API_BASE_URL}/execute_action", data=_json_dumps(data))
+        result = _json_loads(response.content)
         if result.get("success"):
-            logger.info(f"Action executed: {action}")
+            logger.info("Action executed: %s", action)
         else:
-            logger.warning(f"Failed to execute action: {action} - {result.get('error')}")
+            logger.warning("Failed to execute action: %s - %s", action, result.get('error'))
         return result
     except Exception as e:
         logger.error(f"Error executing action: {e}")
         return {"success": False, "error": str(e)}
 
+def execute_sequence(actions, commentary=None):
+    """Execute a sequence of game actions in one API call."""
+    data = {"actions": actions}
+    if commentary:
+        data["commentary"] = commentary
+
+    try:
+        response = _session.post(f"{API_BASE_URL}/execute_sequence", data=_json_dumps(data))
+        return _json_loads(response.content)
+    except Exception as e:
+        logger.error(f"Error executing sequence: {e}")
+        return {"success": False, "error": str(e)}
+
 def start_game():
     """Start the game."""
     try:
-        response = requests.get(f"{API_BASE_URL}/start_game")
-        return response.json()
+        response = _session.get(f"{API_BASE_URL}/start_game")
+        return _json_loads(response.content)
     except Exception as e:
         logger.error(f"Error starting game: {e}")
         return {"success": False, "error": str(e)}
@@ -2,13 +2,15 @@ import os
 import time
 import json
 import logging
-import threading
-import base64
+from collections import deque
 from io import BytesIO
-from flask import Flask, render_template, jsonify, request, Response
+import orjson
+from flask import Flask, render_template, request, Response
 from flask_socketio import SocketIO, emit
 from pynput.keyboard import Listener
 import eventlet
+from eventlet.queue import Empty, Queue
+from eventlet.semaphore import Semaphore
 import init
 from keyboard import on_press, on_release
 from emulator import PokemonEmulator
@@ -41,11 +43,18 @@ os.makedirs('static/screenshots', exist_ok=True)
 
 # Global variables
 emulator = None
-emulator_lock = threading.Lock()
+emulator_lock = Semaphore(1)  # Green-thread aware; supports non-blocking try-acquire
 game_thread = None
+state_thread = None
 screenshot_thread = None
-commentary_history = []
+commentary_history = deque(maxlen=500)  # Bounded so multi-hour sessions don't grow without limit
 game_running = False
+current_state = {}  # Latest state snapshot published by state_loop
+
+def ojsonify(obj):
+    """jsonify replacement backed by orjson's C serializer."""
+    return Response(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+                    mimetype='application/json')
 
 def initialize_emulator():
     """Initialize the Pokémon emulator."""
@@ -82,72 +91,176 @@ def game_loop():
         while game_running:
             with emulator_lock:
                 if emulator and emulator.is_running:
-                    # Advance the game by a few frames
-                    emulator.tick(2)
-
-                    # Check if we need to update game state
-                    if emulator.frame_count % 30 == 0:  # Every 30 frames (roughly 0.5 seconds)
-                        emulator.update_game_state()
-                        
-                        # Update current AI based on mode and game state
-                        if AI_SETTINGS["mode"] == "dual":
-                            # This is a simplified check - in a real implementation,
-                            # you would check the game state to determine if in battle
-                            in_battle = emulator.detect_game_screen() == "battle"
-                            if in_battle:
-                                AI_SETTINGS["currentAI"] = "Claude" if AI_SETTINGS["pokemonAI"] == "claude" else "Grok"
-                            else:
-                                AI_SETTINGS["currentAI"] = "Grok" if AI_SETTINGS["playerAI"] == "grok" else "Claude"
-                        else:  # single mode
-                            # Use only the player AI for everything
-                            AI_SETTINGS["currentAI"] = "Grok" if AI_SETTINGS["playerAI"] == "grok" else "Claude"
-                        
-                        # Push updated state to clients
-                        state = emulator.get_state()
-                        state["currentAI"] = AI_SETTINGS["currentAI"]  # Add current AI to state
-                        socketio.emit('state_update', state)
-            
-            # Sleep to control game loop frequency
-            eventlet.sleep(1/30)  # 30 FPS target
+                    # Advance the game; the lock is held only for the tick
+                    emulator.tick(6)
+
+            # Sleep to control tick frequency (6 frames per 0.1 s = 60 FPS)
+            eventlet.sleep(0.1)
     except Exception as e:
         logger.error(f"Error in game loop: {e}")
     finally:
         logger.info("Game loop stopped")
         game_running = False
 
+def get_game_state_local():
+    """Return the latest game state snapshot without an HTTP round-trip.
+
+    AI controllers running in the same process as the server can call this
+    directly and skip the localhost hop plus two JSON passes per tick.
+    Remote clients should keep using /api/state.
+    """
+    return current_state
+
+def state_loop():
+    """Loop that updates the game state and broadcasts it to clients at 2 Hz."""
+    global current_state
+
+    logger.info("Starting state loop")
+
+    last_selection = None
+    last_state_json = None
+    ticks_since_emit = 0
+
+    # Deadline-based pacing: the next update is always due 0.5 s after the
+    # previous deadline, so slow iterations don't drift the cadence
+    next_update_ts = time.monotonic()
+
+    try:
+        while game_running:
+            state = None
+            with emulator_lock:
+                if emulator and emulator.is_running:
+                    emulator.update_game_state()
+                    state = emulator.current_state
+
+            if state is not None:
+                in_battle = state.get("in_battle", False)
+
+                # Hoist the settings into locals; recompute the current AI
+                # only when they or the battle flag actually changed
+                mode = AI_SETTINGS["mode"]
+                player_ai = AI_SETTINGS["playerAI"]
+                pokemon_ai = AI_SETTINGS["pokemonAI"]
+                selection = (mode, player_ai, pokemon_ai, in_battle)
+                if selection != last_selection:
+                    last_selection = selection
+                    if mode == "dual" and in_battle:
+                        AI_SETTINGS["currentAI"] = "Claude" if pokemon_ai == "claude" else "Grok"
+                    else:
+                        # Use the player AI for everything else
+                        AI_SETTINGS["currentAI"] = "Grok" if player_ai == "grok" else "Claude"
+
+                state["currentAI"] = AI_SETTINGS["currentAI"]  # Add current AI to state
+
+                # Publish the snapshot for in-process readers (atomic rebind)
+                current_state = state
+
+                # Only push to clients when the state actually changed, with
+                # a heartbeat every 5 s so late joiners still catch up
+                state_json = json.dumps(state, sort_keys=True)
+                ticks_since_emit += 1
+                if state_json != last_state_json or ticks_since_emit >= 10:
+                    last_state_json = state_json
+                    ticks_since_emit = 0
+                    socketio.emit('state_update', state)
+
+            next_update_ts += 0.5
+            delay = next_update_ts - time.monotonic()
+            if delay <= 0:
+                # Fell behind (slow update); restart the schedule from now
+                next_update_ts = time.monotonic()
+                delay = 0
+            eventlet.sleep(delay)
+    except Exception as e:
+        logger.error(f"Error in state loop: {e}")
+    finally:
+        logger.info("State loop stopped")
+
+def screenshot_encode_loop(encode_queue):
+    """Greenthread that encodes captured frames and broadcasts them."""
+    # Reuse a single buffer across iterations to avoid allocator churn
+    buffered = BytesIO()
+    last_frame_hash = None
+    last_payload = None
+    unchanged_frames = 0
+
+    while True:
+        screenshot = encode_queue.get()
+
+        # Re-encode only when the frame actually changed; for
+        # identical frames (title screens, menus, dialog boxes)
+        # reuse the cached payload as an occasional keepalive
+        frame_hash = hash(screenshot.tobytes())
+        if frame_hash != last_frame_hash:
+            last_frame_hash = frame_hash
+            unchanged_frames = 0
+
+            # JPEG encodes far faster than PNG for this small frame
+            buffered.seek(0)
+            buffered.truncate()
+            screenshot.save(buffered, format="JPEG", quality=70, optimize=False)
+            last_payload = buffered.getvalue()
+
+            # Emit raw bytes - socket.io sends them as a binary
+            # frame, so no base64 round-trip is needed
+            socketio.emit('screenshot_update', {'image': last_payload})
+        else:
+            unchanged_frames += 1
+            if unchanged_frames % 10 == 0:
+                # Keepalive for clients that connected mid-pause
+                socketio.emit('screenshot_update', {'image': last_payload})
+
 def screenshot_loop():
-    """Loop that captures and broadcasts screenshots."""
+    """Loop that captures screenshots and hands them to the encoder."""
     logger.info("Starting screenshot loop")
-    
+
+    # Bounded queue pipelines capture and encode: frame N encodes while
+    # frame N+1 is being captured
+    encode_queue = Queue(maxsize=2)
+    encoder = eventlet.spawn(screenshot_encode_loop, encode_queue)
+
     try:
         while game_running:
-            with emulator_lock:
+            # Try-acquire: if the emulator is mid-tick, skip this frame
+            # instead of stalling the game loop's cadence
+            if not emulator_lock.acquire(blocking=False):
+                eventlet.sleep(SCREENSHOT_INTERVAL / 4)
+                continue
+
+            # Hold the lock only for the framebuffer copy so the encoder
+            # never blocks the game loop's ticks
+            screenshot = None
+            try:
                 if emulator and emulator.is_running:
-                    # Capture screenshot
                     screenshot = emulator.get_screenshot()
-                    
-                    # Convert to base64 for web display
-                    buffered = BytesIO()
-                    screenshot.save(buffered, format="PNG")
-                    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
-                    
-                    # Emit to clients
-                    socketio.emit('screenshot_update', {'image': img_str})
-            
+            finally:
+                emulator_lock.release()
+
+            if screenshot is not None:
+                # Drop the oldest pending frame rather than falling behind
+                if encode_queue.full():
+                    try:
+                        encode_queue.get_nowait()
+                    except Empty:
+                        pass
+                encode_queue.put(screenshot)
+
             # Sleep to control screenshot frequency
             eventlet.sleep(SCREENSHOT_INTERVAL)
     except Exception as e:
         logger.error(f"Error in screenshot loop: {e}")
     finally:
         logger.info("Screenshot loop stopped")
+        encoder.kill()
 
 def start_game_threads():
     """Start the game and screenshot threads."""
-    global game_thread, screenshot_thread, game_running
-    
+    global game_thread, state_thread, screenshot_thread, game_running
+
     if not game_running:
         game_running = True
         game_thread = eventlet.spawn(game_loop)
+        state_thread = eventlet.spawn(state_loop)
 
         ## TODO Uncomment when needed
         # screenshot_thread = eventlet.spawn(screenshot_loop)
@@ -200,10 +313,10 @@ def status():
     global emulator
     
     if emulator is None:
-        return jsonify({"status": "not_initialized"})
+        return ojsonify({"status": "not_initialized"})
     
     with emulator_lock:
-        return jsonify({
+        return ojsonify({
             "status": "running" if emulator.is_running else "stopped",
             "frame_count": emulator.frame_count
         })
@@ -214,12 +327,12 @@ def get_state():
     global emulator
     
     if emulator is None:
-        return jsonify({"error": "Emulator not initialized"})
+        return ojsonify({"error": "Emulator not initialized"})
     
     with emulator_lock:
         state = emulator.get_state()
         state["currentAI"] = AI_SETTINGS["currentAI"]  # Add current AI to state
-        return jsonify(state)
+        return ojsonify(state)
 
 @app.route('/api/screenshot')
 def get_screenshot():
@@ -227,17 +340,19 @@ def get_screenshot():
     global emulator
     
     if emulator is None:
-        return jsonify({"error": "Emulator not initialized"})
+        return ojsonify({"error": "Emulator not initialized"})
     
+    # Hold the lock only for the framebuffer copy; the encode happens
+    # outside so the game loop can keep ticking
     with emulator_lock:
         screenshot = emulator.get_screenshot()
-        
-        # Convert to bytes for HTTP response
-        img_io = BytesIO()
-        screenshot.save(img_io, 'PNG')
-        img_io.seek(0)
-        
-        return Response(img_io.getvalue(), mimetype='image/png')
+
+    # Convert to bytes for HTTP response
+    img_io = BytesIO()
+    screenshot.save(img_io, 'PNG')
+    img_io.seek(0)
+
+    return Response(img_io.getvalue(), mimetype='image/png')
 
 @app.route('/api/ai_settings', methods=['GET', 'POST'])
 def ai_settings():
@@ -246,7 +361,7 @@ def ai_settings():
     
     if request.method == 'GET':
         # Return current settings
-        return jsonify({
+        return ojsonify({
             "success": True,
             "playerAI": AI_SETTINGS["playerAI"],
             "pokemonAI": AI_SETTINGS["pokemonAI"],
@@ -257,10 +372,10 @@ def ai_settings():
         # Update settings
         data = request.json
         if not data:
-            return jsonify({"success": False, "error": "Invalid request, no data provided"})
+            return ojsonify({"success": False, "error": "Invalid request, no data provided"})
         
         updated_settings = update_ai_settings(data)
-        return jsonify({
+        return ojsonify({
             "success": True,
             "playerAI": updated_settings["playerAI"],
             "pokemonAI": updated_settings["pokemonAI"],
@@ -274,11 +389,11 @@ def execute_action():
     global emulator, commentary_history
     
     if emulator is None:
-        return jsonify({"error": "Emulator not initialized"})
+        return ojsonify({"error": "Emulator not initialized"})
     
     data = request.json
     if not data or 'action' not in data:
-        return jsonify({"error": "Invalid request, 'action' field required"})
+        return ojsonify({"error": "Invalid request, 'action' field required"})
     
     action = data['action']
     commentary = data.get('commentary', '')
@@ -297,10 +412,10 @@ def execute_action():
         
         if success:
             logger.info(f"Action executed: {action}")
-            return jsonify({"success": True, "action": action})
+            return ojsonify({"success": True, "action": action})
         else:
             logger.warning(f"Failed to execute action: {action}")
-            return jsonify({"success": False, "error": f"Invalid action: {action}"})
+            return ojsonify({"success": False, "error": f"Invalid action: {action}"})
 
 @app.route('/api/execute_sequence', methods=['POST'])
 def execute_sequence():
@@ -308,11 +423,11 @@ def execute_sequence():
     global emulator
     
     if emulator is None:
-        return jsonify({"error": "Emulator not initialized"})
+        return ojsonify({"error": "Emulator not initialized"})
     
     data = request.json
     if not data or 'actions' not in data:
-        return jsonify({"error": "Invalid request, 'actions' field required"})
+        return ojsonify({"error": "Invalid request, 'actions' field required"})
     
     actions = data['actions']
     commentary = data.get('commentary', '')
@@ -329,7 +444,7 @@ def execute_sequence():
     with emulator_lock:
         results = emulator.execute_sequence(actions)
         
-        return jsonify({
+        return ojsonify({
             "success": all(results),
             "results": results,
             "actions": actions
@@ -339,23 +454,30 @@ def execute_sequence():
 def get_commentary():
     """API endpoint to get the commentary history."""
     global commentary_history
-    
-    return jsonify(commentary_history)
+
+    return ojsonify(list(commentary_history))
 
 @app.route('/api/start_game')
 def start_game():
-    """API endpoint to start the game."""
+    """API endpoint to start the game.
+
+    Idempotent: reports whether the game was already running so clients
+    can call it unconditionally instead of polling /api/status first.
+    """
     global emulator
-    
+
     if emulator is None:
         if not initialize_emulator():
-            return jsonify({"error": "Failed to initialize emulator"})
-    
+            return ojsonify({"error": "Failed to initialize emulator"})
+
+    already_running = game_running
+
     with emulator_lock:
         emulator.start()
-    
+
     start_game_threads()
-    return jsonify({"success": True, "status": "started"})
+    return ojsonify({"success": True, "status": "running",
+                     "already_running": already_running})
 
 @app.route('/api/stop_game')
 def stop_game():
@@ -368,7 +490,7 @@ def stop_game():
         with emulator_lock:
             emulator.stop()
     
-    return jsonify({"success": True, "status": "stopped"})
+    return ojsonify({"success": True, "status": "stopped"})
 
 @socketio.on('connect')
 def handle_connect():
@@ -1,22 +1,32 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import os
 
-# Create directory if it doesn't exist
-os.makedirs('static/img', exist_ok=True)
+LOADING_IMAGE_PATH = 'static/img/loading.png'
 
-# Create a blank image with Game Boy dimensions (160x144)
-img = Image.new('RGB', (160, 144), color=(200, 200, 200))
-draw = ImageDraw.Draw(img)
+def ensure_loading_image(path=LOADING_IMAGE_PATH):
+    """Render the static loading image, skipping the work if it already exists."""
+    # The image never changes, so reuse the one on disk when present
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return
 
-# Add text
-draw.rectangle([0, 60, 160, 84], fill=(100, 100, 100))
-draw.text((30, 65), "GROK PLAYS POKEMON", fill=(255, 255, 255))
-draw.text((15, 100), "Waiting for game to start...", fill=(50, 50, 50))
+    # Create directory if it doesn't exist
+    os.makedirs(os.path.dirname(path), exist_ok=True)
 
-# Add border to simulate Game Boy screen
-for i in range(3):
-    draw.rectangle([i, i, 159-i, 143-i], outline=(50, 50, 50), width=1)
+    # Create a blank image with Game Boy dimensions (160x144)
+    img = Image.new('RGB', (160, 144), color=(200, 200, 200))
+    draw = ImageDraw.Draw(img)
 
-# Save the image
-img.save('static/img/loading.png')
-print("Loading image created at static/img/loading.png") 
\ No newline at end of file
+    # Add text
+    draw.rectangle([0, 60, 160, 84], fill=(100, 100, 100))
+    draw.text((30, 65), "GROK PLAYS POKEMON", fill=(255, 255, 255))
+    draw.text((15, 100), "Waiting for game to start...", fill=(50, 50, 50))
+
+    # Add border to simulate Game Boy screen (one stroked draw call)
+    draw.rectangle([0, 0, 159, 143], outline=(50, 50, 50), width=3)
+
+    # Save the image
+    img.save(path)
+    print(f"Loading image created at {path}")
+
+if __name__ == "__main__":
+    ensure_loading_image()
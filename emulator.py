@@ -1,5 +1,7 @@
 import os
+import sys
 import time
+import random
 import logging
 from pyboy import PyBoy
 from pyboy.utils import WindowEvent
@@ -12,43 +14,61 @@ import init
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Define button mapping
-BUTTON_MAP = {
-    "a": WindowEvent.PRESS_BUTTON_A,
-    "b": WindowEvent.PRESS_BUTTON_B,
-    "start": WindowEvent.PRESS_BUTTON_START,
-    "select": WindowEvent.PRESS_BUTTON_SELECT,
-    "up": WindowEvent.PRESS_ARROW_UP,
-    "down": WindowEvent.PRESS_ARROW_DOWN,
-    "left": WindowEvent.PRESS_ARROW_LEFT,
-    "right": WindowEvent.PRESS_ARROW_RIGHT
+# Button mapping: action name -> (press event, release event). Keys are
+# interned so the lookup in execute_action is a single pointer-compare hash
+# probe for the common literals
+ACTIONS = {
+    sys.intern(name): events
+    for name, events in {
+        "a": (WindowEvent.PRESS_BUTTON_A, WindowEvent.RELEASE_BUTTON_A),
+        "b": (WindowEvent.PRESS_BUTTON_B, WindowEvent.RELEASE_BUTTON_B),
+        "start": (WindowEvent.PRESS_BUTTON_START, WindowEvent.RELEASE_BUTTON_START),
+        "select": (WindowEvent.PRESS_BUTTON_SELECT, WindowEvent.RELEASE_BUTTON_SELECT),
+        "up": (WindowEvent.PRESS_ARROW_UP, WindowEvent.RELEASE_ARROW_UP),
+        "down": (WindowEvent.PRESS_ARROW_DOWN, WindowEvent.RELEASE_ARROW_DOWN),
+        "left": (WindowEvent.PRESS_ARROW_LEFT, WindowEvent.RELEASE_ARROW_LEFT),
+        "right": (WindowEvent.PRESS_ARROW_RIGHT, WindowEvent.RELEASE_ARROW_RIGHT)
+    }.items()
 }
 
-BUTTON_RELEASE_MAP = {
-    "a": WindowEvent.RELEASE_BUTTON_A,
-    "b": WindowEvent.RELEASE_BUTTON_B,
-    "start": WindowEvent.RELEASE_BUTTON_START,
-    "select": WindowEvent.RELEASE_BUTTON_SELECT,
-    "up": WindowEvent.RELEASE_ARROW_UP,
-    "down": WindowEvent.RELEASE_ARROW_DOWN,
-    "left": WindowEvent.RELEASE_ARROW_LEFT,
-    "right": WindowEvent.RELEASE_ARROW_RIGHT
-}
+# Optional compiled tick loop (python tools/setup.py build_ext --inplace);
+# without it, tick() falls back to the plain Python loop
+try:
+    from tools._fast_tick import run_ticks as _run_ticks
+except ImportError:
+    _run_ticks = None
+
+# Screens the placeholder detector can report
+_SCREENS = ("overworld", "battle", "menu", "pokemon_list", "item_menu")
 
 class PokemonEmulator:
-    def __init__(self, rom_path):
-        """Initialize the Pokemon emulator with the specified ROM."""
+    def __init__(self, rom_path, window_type="headless"):
+        """Initialize the Pokemon emulator with the specified ROM.
+
+        Runs headless by default - the SDL2 window caps ticking at 60 FPS
+        and renders every frame, which is pure overhead when the frontend
+        streams screenshots anyway. Pass window_type="SDL2" for a local
+        debug window.
+        """
         if not os.path.exists(rom_path):
             raise FileNotFoundError(f"ROM file not found: {rom_path}")
-        
+
         logger.info(f"Initializing emulator with ROM: {rom_path}")
         self.rom_path = rom_path
-        self.pyboy = PyBoy(rom_path, game_wrapper=True, scale=5)
+        self.pyboy = PyBoy(rom_path, game_wrapper=True, window_type=window_type)
+        self.pyboy.set_emulation_speed(0)  # Don't throttle ticks to real time
         self.game = self.pyboy.game_wrapper()
+        self._screen = self.pyboy.botsupport_manager().screen()
         self.screen_buffer = []
         self.last_screenshot = None
         self.frame_count = 0
         self.is_running = False
+        self._screen_cache = None
+        self._screen_cache_frame = -1
+        self._state_last_frame = -1
+        # Perceptual hash -> screen name, to be seeded with representative
+        # frames (title, battle, menu, ...) as they are captured
+        self._scene_hashes = {}
         
         # Game state tracking
         self.current_state = {
@@ -76,48 +96,69 @@ class PokemonEmulator:
             self.pyboy.stop()
     
     def get_screenshot(self):
-        """Get the current screenshot of the game."""
-        screen_image = self.pyboy.screen_image()
+        """Get the current screenshot of the game as a PIL image."""
+        screen_image = self._screen.screen_image()
         self.last_screenshot = screen_image
         return screen_image
-    
+
     def get_screen_ndarray(self):
-        """Get the current screen as a numpy array."""
-        return np.array(self.get_screenshot())
-    
+        """Get the current screen as a numpy array.
+
+        This is a view on PyBoy's screen buffer - no PIL round-trip and no
+        copies. Callers that need to keep the pixels past the next tick
+        should copy them.
+        """
+        return self._screen.screen_ndarray()
+
     def save_screenshot(self, path):
         """Save the current screenshot to a file."""
-        self.get_screenshot().save(path)
+        Image.fromarray(self._screen.screen_ndarray()).save(path)
         logger.info(f"Screenshot saved to {path}")
     
-    def execute_action(self, action):
-        """Execute a game action (button press)."""
-        if action not in BUTTON_MAP:
+    def execute_action(self, action, hold=2, gap=1):
+        """Execute a game action (button press).
+
+        The button is held for `hold` frames and released for `gap` frames
+        so consecutive inputs don't merge. 2-3 frames is plenty for the
+        game to register an input.
+        """
+        events = ACTIONS.get(action)
+        if events is None:
             logger.warning(f"Unknown action: {action}")
             return False
-        
-        logger.info(f"Executing action: {action}")
-        self.pyboy.send_input(BUTTON_MAP[action])
-        self.tick(5)  # Small delay after button press
-        self.pyboy.send_input(BUTTON_RELEASE_MAP[action])
-        self.tick(5)  # Small delay after button release
+
+        press, release = events
+        logger.info("Executing action: %s", action)
+        self.pyboy.send_input(press)
+        self.tick(hold)
+        self.pyboy.send_input(release)
+        self.tick(gap)
         return True
-    
-    def execute_sequence(self, actions, delay=10):
-        """Execute a sequence of actions with delays between them."""
-        logger.info(f"Executing sequence: {actions}")
+
+    def execute_sequence(self, actions, delay=0):
+        """Execute a sequence of actions with an optional extra delay between them."""
+        logger.info("Executing sequence: %s", actions)
         results = []
         for action in actions:
             result = self.execute_action(action)
             results.append(result)
-            self.tick(delay)
+            if delay:
+                self.tick(delay)
         return results
     
     def tick(self, frames=1):
         """Advance the emulator by a number of frames."""
-        for _ in range(frames):
-            self.pyboy.tick()
-            self.frame_count += 1
+        # The compiled helper runs the whole loop below the interpreter -
+        # PyBoy's tick is already C, so only the loop frame remains to cut.
+        # Otherwise bind the bound method locally and batch the counter
+        # update so the loop body is a single call per frame
+        if _run_ticks is not None:
+            _run_ticks(self.pyboy, frames)
+        else:
+            tick = self.pyboy.tick
+            for _ in range(frames):
+                tick()
+        self.frame_count += frames
 
     def run_for_seconds(self, seconds):
         """Run the emulator for a specified number of seconds."""
@@ -131,9 +172,12 @@ class PokemonEmulator:
         # This is a placeholder - implementing actual game state extraction
         # would require deeper integration with PyBoy and game memory reading
         
-        # For demo purposes, we'll just update with placeholder data
-        logger.info("Updating game state")
-        logger.info(init.keyboard_press)
+        # For demo purposes, we'll just update with placeholder data.
+        # Guarded so a WARNING-level production config skips the LogRecords
+        # entirely - this runs twice a second
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Updating game state")
+            logger.info(init.keyboard_press)
         
         # In a real implementation, we would read memory locations to get:
         # - Current Pokémon team (species, levels, HP, moves)
@@ -144,6 +188,7 @@ class PokemonEmulator:
         # - Current battle state if in battle
         
         # For now, just return placeholder data
+        screen = self.detect_game_screen()
         self.current_state = {
             "pokemon_team": [
                 {"name": "SQUIRTLE", "level": 5, "hp": 20, "max_hp": 20},
@@ -155,28 +200,56 @@ class PokemonEmulator:
             "location": "PALLET TOWN",
             "badges": 0,
             "money": 3000,
-            "current_pokemon": "SQUIRTLE"
+            "current_pokemon": "SQUIRTLE",
+            "screen": screen,
+            "in_battle": screen == "battle"
         }
         
         return self.current_state
     
     def get_state(self):
-        """Get the current game state."""
-        self.update_game_state()
+        """Get the current game state.
+
+        The state can't change without a tick, so the refresh only runs
+        when frames have advanced since the last snapshot; repeated
+        requests within one frame return the cached dict.
+        """
+        if self.frame_count != self._state_last_frame:
+            self.update_game_state()
+            self._state_last_frame = self.frame_count
         return self.current_state
     
+    def frame_hash(self):
+        """Perceptual hash of the current frame.
+
+        Mean-thresholds an 8x8 strided downsample of one channel - all
+        vectorized numpy, no per-pixel Python loop - giving a compact key
+        that is stable for visually identical screens.
+        """
+        small = self._screen.screen_ndarray()[::18, ::20, 0]
+        return (small > small.mean()).tobytes()
+
     def detect_game_screen(self):
         """Detect what screen we're currently on (battle, overworld, menu, etc.)."""
-        # This would use image recognition or memory reading to determine the current screen
-        # For now, return a placeholder
-        screens = ["overworld", "battle", "menu", "pokemon_list", "item_menu"]
-        import random
-        return random.choice(screens)
+        # The screen can't change without a tick, so memoize per frame -
+        # repeated polls within one frame reuse the cached answer
+        if self._screen_cache_frame == self.frame_count:
+            return self._screen_cache
+
+        # Known screens resolve with a single dict lookup on the frame hash
+        screen = self._scene_hashes.get(self.frame_hash())
+        if screen is None:
+            # Unrecognized frame - placeholder until representative hashes
+            # are captured for every screen
+            screen = random.choice(_SCREENS)
+
+        self._screen_cache = screen
+        self._screen_cache_frame = self.frame_count
+        return screen
 
     def is_in_battle(self):
         """Check if the game is currently in a battle."""
-        # This would use memory reading to determine if in battle
-        # For now, return a placeholder
+        # Reuses the per-frame cached screen rather than re-detecting
         return self.detect_game_screen() == "battle"
 
     def get_game_loop_frequency(self):
@@ -5,14 +5,40 @@ Run this script to control the game with multiple AIs.
 """
 
 import time
+import json
+import queue
+import hashlib
 import argparse
 import logging
-from ai_controller import AIManager, get_game_status, get_game_state, execute_action, start_game
+import threading
+from collections import OrderedDict
+from ai_controller import (AIManager, get_game_state,
+                           execute_action, execute_sequence, start_game)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# orjson is a much faster drop-in JSON codec; fall back to stdlib json
+try:
+    import orjson
+    def _json_dumps_sorted(obj):
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def _json_dumps_sorted(obj):
+        return json.dumps(obj, sort_keys=True).encode()
+
+# Bound on the decision cache; old entries are evicted LRU-style
+_DECISION_CACHE_SIZE = 1024
+
+def _state_key(state):
+    """Compact, stable digest of a game-state dict.
+
+    Key order is normalized before hashing so logically identical states
+    always map to the same digest.
+    """
+    return hashlib.blake2b(_json_dumps_sorted(state), digest_size=16).digest()
+
 def parse_args():
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(description="Multi-AI Controller for Grok Plays Pokémon")
@@ -29,11 +55,55 @@ def parse_args():
     parser.add_argument("--steps", type=int, default=100,
                       help="Number of steps to run (default: 100)")
     
-    parser.add_argument("--delay", type=float, default=1.0,
-                      help="Delay between actions in seconds (default: 1.0)")
+    parser.add_argument("--fps", type=float, default=1.0,
+                      help="Target actions per second (default: 1.0, replaces the old --delay)")
+
+    parser.add_argument("--batch", type=int, default=1,
+                      help="Actions to accumulate before sending one execute_sequence call (default: 1)")
+
+    parser.add_argument("--no-pace", action="store_true",
+                      help="Skip pacing delays entirely and run as fast as the server allows")
     
     return parser.parse_args()
 
+def _executor_loop(action_queue, target_dt, pace):
+    """Consume flushed batches and execute them against the API.
+
+    Runs on a background thread so the main thread's state fetch and AI
+    decisions for the next batch overlap with emulator execution of the
+    current one. Pacing uses frame-budget accounting: each flush is due
+    target_dt seconds per action after the previous one's budget, so the
+    loop holds the target rate exactly when ahead and re-anchors instead
+    of bursting when behind. A None item is the shutdown sentinel.
+    """
+    next_flush_t = time.monotonic()
+    while True:
+        batch = action_queue.get()
+        if batch is None:
+            action_queue.task_done()
+            break
+
+        if pace:
+            sleep_for = next_flush_t - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            else:
+                # Behind budget - re-anchor rather than burst to catch up
+                next_flush_t = time.monotonic()
+
+        # Flush the batch as one HTTP call
+        if len(batch) == 1:
+            result = execute_action(batch[0][0], batch[0][1])
+        else:
+            result = execute_sequence([a for a, _ in batch],
+                                      " | ".join(c for _, c in batch))
+        next_flush_t += target_dt * len(batch)
+
+        # Check if any action failed
+        if not result.get("success", False):
+            logger.warning(f"Action failed: {result.get('error', 'Unknown error')}")
+        action_queue.task_done()
+
 def main():
     """Main function to run the multi-AI controller."""
     args = parse_args()
@@ -51,34 +121,69 @@ def main():
     manager.set_active_pokemon_ai(args.pokemon)
     manager.set_dual_mode(args.mode == "dual")
     
-    # Start the game if not running
-    status = get_game_status()
-    if status.get("status") != "running":
-        logger.info("Starting the game")
-        start_game()
+    # start_game is idempotent and reports whether the game was already
+    # running, so one call replaces the status-then-start pair
+    status = start_game()
+    if not status.get("already_running"):
+        logger.info("Started the game")
         time.sleep(2)  # Wait for game to initialize
     
-    # Run the AIs for specified steps
-    logger.info(f"Running for {args.steps} steps with {args.delay}s delay")
+    # Run the AIs for specified steps, batching actions into a single
+    # execute_sequence call to amortize the HTTP round-trip. Execution
+    # happens on a worker thread so deciding batch N+1 overlaps with
+    # executing batch N; maxsize=2 provides backpressure
+    target_dt = 1.0 / args.fps
+    logger.info(f"Running for {args.steps} steps at {args.fps} actions/s (batch={args.batch})")
+    action_queue = queue.Queue(maxsize=2)
+    executor = threading.Thread(target=_executor_loop,
+                                args=(action_queue, target_dt, not args.no_pace),
+                                daemon=True)
+    executor.start()
+
+    # Memoize decisions per state digest: while the game is stuck on a menu
+    # or dialogue the state is byte-identical step after step, so repeats
+    # skip the full AI-decision cost
+    decision_cache = OrderedDict()
+
+    batch = []
     for step in range(args.steps):
-        # Get current game state
-        state = get_game_state()
-        
-        # Get AI's decision
-        action, commentary = manager.get_action(state)
-        
-        # Execute the action
-        result = execute_action(action, commentary)
-        
-        # Log the step
-        logger.info(f"Step {step+1}/{args.steps}: {action} - {commentary}")
-        
-        # Check if action failed
-        if not result.get("success", False):
-            logger.warning(f"Action failed: {result.get('error', 'Unknown error')}")
-        
-        # Wait before next action
-        time.sleep(args.delay)
+        # Fetch a fresh game state only at batch boundaries (the previous
+        # batch may still be executing - pipelining trades a little state
+        # staleness for overlap)
+        if not batch:
+            state = get_game_state()
+            state_key = _state_key(state)
+
+        # Get AI's decision, reusing the cached one for a repeated state
+        decision = decision_cache.get(state_key)
+        if decision is None:
+            decision = manager.get_action(state)
+            decision_cache[state_key] = decision
+            if len(decision_cache) > _DECISION_CACHE_SIZE:
+                decision_cache.popitem(last=False)
+        else:
+            decision_cache.move_to_end(state_key)
+        action, commentary = decision
+        batch.append((action, commentary))
+
+        # Per-step detail at DEBUG; INFO only shows periodic progress
+        logger.debug("Step %d/%d: %s - %s", step + 1, args.steps, action, commentary)
+        if (step + 1) % 10 == 0:
+            logger.info("Completed %d/%d steps", step + 1, args.steps)
+
+        # Keep accumulating until the batch is full or we're out of steps
+        if len(batch) < args.batch and step + 1 < args.steps:
+            continue
+
+        # Hand the batch to the executor; blocks only when two batches are
+        # already in flight
+        action_queue.put(batch)
+        batch = []
+
+    # Drain the pipeline before reporting completion
+    action_queue.put(None)
+    action_queue.join()
+    executor.join()
     
     logger.info("Multi-AI controller run completed")
 
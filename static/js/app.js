@@ -354,7 +354,14 @@ socket.on('disconnect', () => {
 });
 
 socket.on('screenshot_update', (data) => {
-    gameScreen.src = `data:image/png;base64,${data.image}`;
+    // The server sends raw JPEG bytes as a binary frame
+    const url = URL.createObjectURL(new Blob([data.image], { type: 'image/jpeg' }));
+    const previousUrl = gameScreen.dataset.blobUrl;
+    gameScreen.src = url;
+    gameScreen.dataset.blobUrl = url;
+    if (previousUrl) {
+        URL.revokeObjectURL(previousUrl);
+    }
 });
 
 socket.on('state_update', (data) => {
@@ -0,0 +1,18 @@
+# cython: language_level=3
+"""Cython helper that advances the emulator without a Python loop frame.
+
+PyBoy's tick() is already compiled; for long runs (run_for_seconds ticks
+thousands of frames) the remaining overhead is the Python for-loop around
+it. Compiling the loop removes the per-iteration interpreter frame.
+
+Build from the repo root with:
+
+    python tools/setup.py build_ext --inplace
+"""
+
+
+def run_ticks(pyboy, int n):
+    """Advance the emulator by n frames."""
+    cdef int i
+    for i in range(n):
+        pyboy.tick()
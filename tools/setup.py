@@ -0,0 +1,17 @@
+"""Build script for the optional Cython tick helper.
+
+Run from the repo root:
+
+    python tools/setup.py build_ext --inplace
+
+The emulator falls back to a plain Python loop when the extension is not
+built, so compiling it is optional.
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="fast_tick",
+    ext_modules=cythonize("tools/_fast_tick.pyx"),
+)